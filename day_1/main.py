@@ -52,26 +52,263 @@ Multiplying them together produces the answer, 241861950.
 In your expense report, what is the product of the three entries that sum to 2020?
 
 """
-from itertools import combinations_with_replacement
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import reduce
+from itertools import combinations
+from math import comb
+from operator import mul
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 INPUT_FILE: Path = Path(__file__).parent / "input.txt"
 INPUTS: List[int] = [int(num) for num in INPUT_FILE.read_text().split()]
+TARGET: int = 2020
 
 
-def solution_part_1(inputs: List[int]) -> int:
-    for a, b in combinations_with_replacement(inputs, 2):
-        if a + b == 2020:
-            return a * b
-        pass
+def two_sum(values: List[int], target: int) -> Optional[Tuple[int, int]]:
+    """Find two distinct entries summing to target through a single pass with a hash set lookup."""
+    seen = set()
+    for value in values:
+        if target - value in seen:
+            return target - value, value
+        seen.add(value)
+    return None
 
 
-def solution_part_2(inputs: List[int]) -> int:
-    for a, b, c in combinations_with_replacement(inputs, 3):
-        if a + b + c == 2020:
-            return a * b * c
-        pass
+def three_sum(values: List[int], target: int) -> Optional[Tuple[int, int, int]]:
+    """Find three distinct entries summing to target with a sorted two-pointer sweep."""
+    ordered = sorted(values)
+    for first_index in range(len(ordered) - 2):
+        low, high = first_index + 1, len(ordered) - 1
+        while low < high:
+            total = ordered[first_index] + ordered[low] + ordered[high]
+            if total == target:
+                return ordered[first_index], ordered[low], ordered[high]
+            elif total < target:
+                low += 1
+            else:
+                high -= 1
+    return None
+
+
+def meet_in_the_middle_sum(values: List[int], target: int, k: int) -> Optional[Tuple[int, ...]]:
+    """
+    Find k distinct entries summing to target by indexing the sums of all (k // 2)-sized index
+    combinations, then looking up the complement of each (k - k // 2)-sized index combination.
+    """
+    half_sums: Dict[int, List[Tuple[int, ...]]] = {}
+    for indices in combinations(range(len(values)), k // 2):
+        half_sums.setdefault(sum(values[i] for i in indices), []).append(indices)
+
+    for indices in combinations(range(len(values)), k - k // 2):
+        complement = target - sum(values[i] for i in indices)
+        for other_indices in half_sums.get(complement, []):
+            if not set(indices).intersection(other_indices):  # entries can't be used twice
+                return tuple(sorted(values[i] for i in indices + other_indices))
+    return None
+
+
+def k_sum(values: List[int], target: int = TARGET, k: int = 2) -> Optional[Tuple[int, ...]]:
+    """Return k distinct entries of values that sum to target, or None if there are none."""
+    if k < 1:
+        raise ValueError("The number of entries to sum must be at least 1")
+    if k == 1:
+        return (target,) if target in values else None
+    if k == 2:
+        return two_sum(values, target)
+    if k == 3:
+        return three_sum(values, target)
+    return meet_in_the_middle_sum(values, target, k)
+
+
+def build_value_index(values: List[int]) -> Counter:
+    """Return the value -> count index of the provided entries, to be built once and reused."""
+    return Counter(values)
+
+
+def _iter_value_groups(
+    keys: List[int], index: Counter, target: int, k: int, start: int
+) -> Iterator[Tuple[Tuple[int, int], ...]]:
+    """
+    Yield groups of (value, multiplicity) pairs, drawing values in increasing order from
+    keys[start:], whose multiplicities add up to k and whose weighted sum is the target.
+    """
+    if k == 1:
+        if target in index and target >= keys[start]:  # keys are sorted, so it is in keys[start:]
+            yield ((target, 1),)
+        return
+
+    for position in range(start, len(keys)):
+        value = keys[position]
+        if value * k > target:  # all remaining values are larger, no way to reach the target
+            break
+        for multiplicity in range(1, min(index[value], k) + 1):
+            remainder = target - multiplicity * value
+            if multiplicity == k:
+                if remainder == 0:
+                    yield ((value, multiplicity),)
+            elif position + 1 < len(keys):
+                for group in _iter_value_groups(
+                    keys, index, remainder, k - multiplicity, position + 1
+                ):
+                    yield ((value, multiplicity),) + group
+
+
+def _count_value_groups(
+    keys: List[int], index: Counter, target: int, k: int, start: int, multiplicity_aware: bool
+) -> int:
+    """Same traversal as _iter_value_groups, but only sums up weights and never builds groups."""
+    if k == 1:
+        if target in index and target >= keys[start]:
+            return index[target] if multiplicity_aware else 1
+        return 0
+
+    total = 0
+    for position in range(start, len(keys)):
+        value = keys[position]
+        if value * k > target:
+            break
+        for multiplicity in range(1, min(index[value], k) + 1):
+            weight = comb(index[value], multiplicity) if multiplicity_aware else 1
+            remainder = target - multiplicity * value
+            if multiplicity == k:
+                total += weight if remainder == 0 else 0
+            elif position + 1 < len(keys):
+                total += weight * _count_value_groups(
+                    keys, index, remainder, k - multiplicity, position + 1, multiplicity_aware
+                )
+    return total
+
+
+def iter_k_sum_solutions(
+    index: Counter, target: int = TARGET, k: int = 2
+) -> Iterator[Tuple[int, ...]]:
+    """
+    Lazily yield every distinct k-tuple of entries (in increasing order) summing to the target. A
+    value can only appear in a tuple as many times as it is found in the report.
+    """
+    if k < 1:
+        raise ValueError("The number of entries to sum must be at least 1")
+    keys = sorted(index)
+    if not keys:
+        return
+    for group in _iter_value_groups(keys, index, target, k, start=0):
+        yield tuple(value for value, multiplicity in group for _ in range(multiplicity))
+
+
+def count_k_sum_solutions(
+    index: Counter, target: int = TARGET, k: int = 2, multiplicity_aware: bool = False
+) -> int:
+    """
+    Return the number of distinct k-tuples of entries summing to the target, without building
+    them. If multiplicity_aware, count combinations of entries instead, so that duplicated values
+    contribute once per way of picking them from the report.
+    """
+    if k < 1:
+        raise ValueError("The number of entries to sum must be at least 1")
+    keys = sorted(index)
+    if not keys:
+        return 0
+    return _count_value_groups(keys, index, target, k, 0, multiplicity_aware)
+
+
+def build_sorted_entries(values: List[int], k: int) -> array:
+    """
+    Sort the entries once into a compact array, keeping each value at most k times since no
+    k-sum can use it more often than that.
+    """
+    capped = (value for value, count in Counter(values).items() for _ in range(min(count, k)))
+    return array("q", sorted(capped))
+
+
+def batch_k_sum_products(
+    values: List[int], targets: Iterable[int], k: int = 2, missing: Optional[int] = None
+) -> List[Optional[int]]:
+    """
+    Return, for each target, the product of k distinct entries summing to it, or the missing
+    sentinel if there are none. A single value index is shared by the whole batch, and targets are
+    answered by complement lookups into it, driven by filter / map so that only the hits run
+    Python code. For pairs, the index is only grown over the entries as far as a target needs it.
+    """
+    if k not in (2, 3):
+        raise ValueError("Batched queries are only supported for pairs and triples")
+    results: List[Optional[int]] = []
+    if k == 2:
+        index: Counter = Counter()
+        unindexed = iter(values)
+        bounds: Optional[Tuple[int, int]] = None  # reachable sums, known once all are indexed
+        for target in targets:
+            product = None
+            if bounds is None or bounds[0] <= target <= bounds[1]:
+                product = _find_indexed_pair_product(index, target)
+                if product is None and bounds is None:
+                    product = _index_pair_product(index, unindexed, target)
+                    if product is None:  # the remaining entries were all indexed in the search
+                        bounds = (2 * min(index), 2 * max(index)) if index else (0, -1)
+            results.append(missing if product is None else product)
+        return results
+
+    index = build_value_index(values)
+    entries = build_sorted_entries(values, k)
+    for target in targets:
+        product = _find_triple_product(entries, index, target)
+        results.append(missing if product is None else product)
+    return results
+
+
+def _find_indexed_pair_product(index: Counter, target: int) -> Optional[int]:
+    """Product of the first two entries of the value index summing to the target, if any."""
+    for complement in filter(index.__contains__, map(target.__sub__, index)):
+        if 2 * complement != target or index[complement] > 1:  # a single entry can't be used twice
+            return complement * (target - complement)
+    return None
+
+
+def _index_pair_product(index: Counter, unindexed: Iterator[int], target: int) -> Optional[int]:
+    """
+    Keep adding entries to the value index, as two_sum does with its set, until one of them
+    completes a pair summing to the target, and return its product. The index is left grown for
+    the next targets.
+    """
+    for value in unindexed:
+        complement = target - value
+        found = complement in index
+        index[value] = index.get(value, 0) + 1
+        if found:
+            return value * complement
+    return None
+
+
+def _find_triple_product(entries: array, index: Counter, target: int) -> Optional[int]:
+    """
+    Product of the first triple of sorted entries, anchor <= second <= third, summing to the
+    target. For each anchor, seconds are bisected to those leaving a third between themselves and
+    the largest entry, and thirds are looked up in the value index, which must hold enough copies
+    of repeated values.
+    """
+    for anchor_position, anchor in enumerate(entries):
+        if 3 * anchor > target:  # the other two entries are larger, target is out of reach
+            break
+        remainder = target - anchor
+        low = bisect_left(entries, remainder - entries[-1], anchor_position + 1)
+        seconds = entries[low : bisect_right(entries, remainder // 2, low)]
+        for third in filter(index.__contains__, map(remainder.__sub__, seconds)):
+            second = remainder - third
+            if index[third] > (third == anchor) + (third == second):
+                return anchor * second * third
+    return None
+
+
+def solution_part_1(inputs: List[int], target: int = TARGET) -> Optional[int]:
+    entries = k_sum(inputs, target, k=2)
+    return reduce(mul, entries) if entries else None
+
+
+def solution_part_2(inputs: List[int], target: int = TARGET) -> Optional[int]:
+    entries = k_sum(inputs, target, k=3)
+    return reduce(mul, entries) if entries else None
 
 
 if __name__ == "__main__":
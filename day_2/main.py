@@ -51,46 +51,205 @@ Given the same example list from above:
 
 How many passwords are valid according to the new interpretation of the policies?
 """
-import shlex
+import os
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 INPUT_FILE: Path = Path(__file__).parent / "input.txt"
-INPUT_LINES: List[str] = INPUT_FILE.read_text().split("\n")
+LINE_REGEX = re.compile(r"(\d+)-(\d+) (\w): (\w*)")
+CHUNK_SIZE: int = 1 << 20  # read 1MB of the file at a time when streaming
 
 
 def get_line_elements(line: str) -> Tuple[int, int, str, str]:
     """For a given line, return the lower & higher bounds, the specific letter and the password."""
-    bounds_str, letter, password = shlex.split(line)
-    letter = letter[0]
-    bounds_ints = int(bounds_str.split("-")[0]), int(bounds_str.split("-")[-1])
-    lower_bound, higher_bound = min(bounds_ints), max(bounds_ints)
+    match = LINE_REGEX.fullmatch(line.rstrip("\r"))
+    if not match:
+        raise ValueError(f"Invalid password entry: '{line}'")
+    bound_1, bound_2, letter, password = match.groups()
+    bound_1, bound_2 = int(bound_1), int(bound_2)
+    lower_bound, higher_bound = min(bound_1, bound_2), max(bound_1, bound_2)
     return lower_bound, higher_bound, letter, password
 
 
-def solution_part_1(inputs: List[str]) -> int:
-    valid_passwords = 0
-    for entry_line in inputs:
-        lower_bound, higher_bound, letter, password = get_line_elements(entry_line)
-        if lower_bound <= password.count(letter) <= higher_bound:
-            valid_passwords += 1
+def is_valid_part_1(lower_bound: int, higher_bound: int, letter: str, password: str) -> bool:
+    """The letter must be found between lower_bound and higher_bound times in the password."""
+    return lower_bound <= password.count(letter) <= higher_bound
+
+
+def is_valid_part_2(position_1: int, position_2: int, letter: str, password: str) -> bool:
+    """The letter must be found at exactly one of the two (1-indexed) positions in the password."""
+    return (password[position_1 - 1 : position_1] == letter) != (
+        password[position_2 - 1 : position_2] == letter
+    )
+
+
+def iter_entries(
+    input_file: Path = INPUT_FILE,
+    chunk_size: int = CHUNK_SIZE,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[Tuple[int, int, str, str]]:
+    """
+    Lazily yield the parsed elements of each line of the file, reading it by chunks so that memory
+    usage doesn't depend on the size of the file. Empty lines are skipped. The start and end byte
+    offsets restrict reading to a part of the file, and should be aligned on line starts.
+    """
+    with input_file.open("rb") as file:
+        file.seek(start)
+        to_read = end - start if end is not None else float("inf")
+        remainder = b""
+        while to_read > 0 and (chunk := file.read(min(chunk_size, to_read))):
+            to_read -= len(chunk)
+            complete_lines, _, remainder = (remainder + chunk).rpartition(b"\n")
+            for line in complete_lines.decode().split("\n"):
+                if line:
+                    yield get_line_elements(line)
+        if remainder:  # last line if the file or shard doesn't end with a newline
+            yield get_line_elements(remainder.decode())
+
+
+def stream_valid_counts(
+    input_file: Path = INPUT_FILE,
+    chunk_size: int = CHUNK_SIZE,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[Tuple[int, int]]:
+    """Yield the running counts of valid passwords for both policies, evaluated in a single pass."""
+    valid_part_1, valid_part_2 = 0, 0
+    for entry in iter_entries(input_file, chunk_size, start, end):
+        valid_part_1 += is_valid_part_1(*entry)
+        valid_part_2 += is_valid_part_2(*entry)
+        yield valid_part_1, valid_part_2
+
+
+def count_valid_passwords(
+    input_file: Path = INPUT_FILE,
+    chunk_size: int = CHUNK_SIZE,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Tuple[int, int]:
+    """Return the final counts of valid passwords for both policies, streaming through the file."""
+    counts = (0, 0)
+    for counts in stream_valid_counts(input_file, chunk_size, start, end):
         pass
-    return valid_passwords
-
-
-def solution_part_2(inputs: List[str]) -> int:
-    valid_passwords = 0
-    for entry_line in inputs:
-        position_1, position_2, letter, password = get_line_elements(entry_line)
-        index_1, index_2 = position_1 - 1, position_2 - 1
-        if (password[index_1] == letter and password[index_2] != letter) or (
-            password[index_1] != letter and password[index_2] == letter
-        ):
-            valid_passwords += 1
-        pass
-    return valid_passwords
+    return counts
+
+
+def get_shard_offsets(input_file: Path, n_shards: int) -> List[Tuple[int, int]]:
+    """
+    Split the file into at most n_shards (start, end) byte ranges of similar sizes, with each
+    boundary moved forward to the start of the next line so that no line is cut in two.
+    """
+    file_size = input_file.stat().st_size
+    boundaries = [0]
+    with input_file.open("rb") as file:
+        for shard in range(1, n_shards):
+            file.seek(max(file_size * shard // n_shards, boundaries[-1]))
+            file.readline()  # move to the start of the next line
+            boundaries.append(min(file.tell(), file_size))
+    boundaries.append(file_size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def count_valid_passwords_parallel(
+    input_file: Path = INPUT_FILE, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE
+) -> Tuple[int, int]:
+    """
+    Return the counts of valid passwords for both policies, with the file split in one shard per
+    worker and each shard validated in its own process. Defaults to one worker per CPU core.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = get_shard_offsets(input_file, workers)
+    if not shards:
+        return 0, 0
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+        shard_counts = executor.map(
+            count_valid_passwords,
+            [input_file] * len(shards),
+            [chunk_size] * len(shards),
+            [start for start, _ in shards],
+            [end for _, end in shards],
+        )
+        valid_part_1, valid_part_2 = 0, 0
+        for shard_part_1, shard_part_2 in shard_counts:
+            valid_part_1 += shard_part_1
+            valid_part_2 += shard_part_2
+    return valid_part_1, valid_part_2
+
+
+@dataclass
+class PasswordColumns:
+    """
+    Columnar representation of a password file: one array per policy element, and all passwords
+    concatenated in a single buffer, the i-th one spanning passwords[offsets[i] : offsets[i + 1]].
+    """
+
+    lower_bounds: array
+    higher_bounds: array
+    letters: array
+    offsets: array
+    passwords: bytes
+
+
+def load_columns(input_file: Path = INPUT_FILE, chunk_size: int = CHUNK_SIZE) -> PasswordColumns:
+    """Parse the file once into a PasswordColumns, for both policies to be evaluated on."""
+    lower_bounds, higher_bounds, letters = array("L"), array("L"), array("B")
+    offsets, passwords = array("Q", [0]), bytearray()
+    for lower_bound, higher_bound, letter, password in iter_entries(input_file, chunk_size):
+        lower_bounds.append(lower_bound)
+        higher_bounds.append(higher_bound)
+        letters.append(ord(letter))
+        passwords += password.encode("ascii")
+        offsets.append(len(passwords))
+    return PasswordColumns(lower_bounds, higher_bounds, letters, offsets, bytes(passwords))
+
+
+def count_valid_columns_part_1(columns: PasswordColumns) -> int:
+    """Count letters in place in the passwords buffer, without slicing out any password."""
+    count = columns.passwords.count
+    return sum(
+        lower_bound <= count(letter, start, end) <= higher_bound
+        for lower_bound, higher_bound, letter, start, end in zip(
+            columns.lower_bounds,
+            columns.higher_bounds,
+            columns.letters,
+            columns.offsets,
+            islice(columns.offsets, 1, None),
+        )
+    )
+
+
+def count_valid_columns_part_2(columns: PasswordColumns) -> int:
+    """Gather both positions' characters straight from the passwords buffer and XOR the checks."""
+    passwords = columns.passwords
+    return sum(
+        (0 < position_1 <= end - start and passwords[start + position_1 - 1] == letter)
+        != (0 < position_2 <= end - start and passwords[start + position_2 - 1] == letter)
+        for position_1, position_2, letter, start, end in zip(
+            columns.lower_bounds,
+            columns.higher_bounds,
+            columns.letters,
+            columns.offsets,
+            islice(columns.offsets, 1, None),
+        )
+    )
+
+
+def solution_part_1(inputs: Iterable[str]) -> int:
+    return sum(is_valid_part_1(*get_line_elements(entry_line)) for entry_line in inputs)
+
+
+def solution_part_2(inputs: Iterable[str]) -> int:
+    return sum(is_valid_part_2(*get_line_elements(entry_line)) for entry_line in inputs)
 
 
 if __name__ == "__main__":
-    print(f"Solution for part 1:  {solution_part_1(INPUT_LINES)}")
-    print(f"Solution for part 2:  {solution_part_2(INPUT_LINES)}")
+    part_1, part_2 = count_valid_passwords(INPUT_FILE)
+    print(f"Solution for part 1:  {part_1}")
+    print(f"Solution for part 2:  {part_2}")
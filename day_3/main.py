@@ -86,42 +86,90 @@ together, these produce the answer 336.
 What do you get if you multiply together the number of trees encountered on each of the listed
 slopes?
 """
+from dataclasses import dataclass
 from functools import reduce
 from operator import mul
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Tuple
 
 INPUT_FILE: Path = Path(__file__).parent / "input.txt"
 INPUT_LINES: List[str] = INPUT_FILE.read_text().split("\n")
-PUZZLE: List[str] = [1000 * line for line in INPUT_LINES]
 STARTING_COORDINATES = (0, 0)
+TREE_BITS = str.maketrans({"#": "1", ".": "0"})
 
 
-def get_trees_for_slope(inputs: List[str], slope: Tuple[int, int]) -> int:
+@dataclass
+class Forest:
+    """Map stored once, each row as an integer with bit i set if there is a tree at column i."""
+
+    rows: List[int]
+    width: int
+
+
+def parse_forest(lines: List[str]) -> Forest:
+    lines = [line for line in lines if line]
+    rows = [int(line[::-1].translate(TREE_BITS), 2) for line in lines]  # column 0 is lowest bit
+    return Forest(rows=rows, width=len(lines[0]) if lines else 0)
+
+
+PUZZLE: Forest = parse_forest(INPUT_LINES)
+
+
+def get_trees_for_slope(forest: Forest, slope: Tuple[int, int]) -> int:
+    """Walk down the forest, wrapping columns around since the pattern repeats to the right."""
+    if slope[1] <= 0:
+        raise ValueError("The slope has to go down the map to ever reach the bottom")
     line, element = STARTING_COORDINATES
     encountered_trees = 0
 
-    while line < len(inputs):
-        if inputs[line][element] == "#":
-            encountered_trees += 1
+    while line < len(forest.rows):
+        encountered_trees += (forest.rows[line] >> (element % forest.width)) & 1
         element += slope[0]
         line += slope[1]
 
     return encountered_trees
 
 
-def solution_part_1(inputs: List[str]) -> int:
+def count_trees_many(forest: Forest, slopes: Iterable[Tuple[int, int]]) -> List[int]:
+    """
+    Return the number of trees encountered for each of the provided slopes. Since the map repeats
+    horizontally, slopes are reduced to (right % width, min(down, height)) before being walked,
+    so that each equivalent slope is only ever counted once for the whole batch.
+    """
+    counts: Dict[Tuple[int, int], int] = {}
+    results: List[int] = []
+
+    for right, down in slopes:
+        if down <= 0:
+            raise ValueError("The slope has to go down the map to ever reach the bottom")
+        reduced_right = right % forest.width if forest.width else 0
+        reduced_down = max(1, min(down, len(forest.rows)))  # still 1 on an empty forest
+        reduced_slope = (reduced_right, reduced_down)
+        if reduced_slope not in counts:
+            counts[reduced_slope] = get_trees_for_slope(forest, reduced_slope)
+        results.append(counts[reduced_slope])
+    return results
+
+
+def best_slope(
+    forest: Forest, search_space: Iterable[Tuple[int, int]]
+) -> Tuple[Tuple[int, int], int]:
+    """Return the slope of the search space encountering the fewest trees, and that tree count."""
+    slopes = list(search_space)
+    if not slopes:
+        raise ValueError("Can't find the best slope in an empty search space")
+    counts = count_trees_many(forest, slopes)
+    best_index = min(range(len(slopes)), key=counts.__getitem__)  # first one wins on ties
+    return slopes[best_index], counts[best_index]
+
+
+def solution_part_1(inputs: Forest) -> int:
     return get_trees_for_slope(inputs, (3, 1))
 
 
-def solution_part_2(inputs: List[str]) -> int:
-    line, element = STARTING_COORDINATES
+def solution_part_2(inputs: Forest) -> int:
     slopes = [(1, 1), (3, 1), (5, 1), (7, 1), (1, 2)]
-    results: List[int] = []
-
-    for slope in slopes:
-        results.append(get_trees_for_slope(inputs, slope))
-    return reduce(mul, results)
+    return reduce(mul, count_trees_many(inputs, slopes))
 
 
 if __name__ == "__main__":
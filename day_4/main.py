@@ -132,98 +132,406 @@ iyr:2010 hgt:158cm hcl:#b6652a ecl:blu byr:1944 eyr:2021 pid:093154719
 Count the number of valid passports - those that have all required fields and valid values.
 Continue to treat cid as optional. In your batch file, how many passports are valid?
 """
-import shlex
+import json
+import os
+import re
+import struct
+import sys
+from array import array
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Set
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 INPUT_FILE: Path = Path(__file__).parent / "input.txt"
-PASSPORT_LINES: List[str] = [e.replace("\n", " ") for e in INPUT_FILE.read_text().split("\n\n")]
 
 REQUIRED_FIELDS: Set[str] = {"byr", "iyr", "eyr", "hgt", "hcl", "ecl", "pid"}
+KNOWN_FIELDS: Tuple[str, ...] = ("byr", "cid", "ecl", "eyr", "hcl", "hgt", "iyr", "pid")
+FLAG_DIGITS: bytes = bytes.maketrans(b"\x00\x01", b"01")  # 0 / 1 flag bytes to binary digits
+
+
+@dataclass
+class FieldRule:
+    """
+    Declarative validation rule for a field's value, all given settings have to be satisfied.
+    The value must be one of the choices and fully match the pattern, and its number (first group
+    of the pattern, or the whole value if it has no group or there is no pattern) must fall within
+    the bounds. With unit_bounds, the pattern's second group is a unit and the number must fall
+    within that unit's bounds. A rule with no setting only requires the field to be present.
+    """
+
+    pattern: Optional[str] = None
+    choices: Optional[Tuple[str, ...]] = None
+    bounds: Optional[Tuple[int, int]] = None
+    unit_bounds: Optional[Dict[str, Tuple[int, int]]] = None
+
+
+FIELD_RULES: Dict[str, FieldRule] = {
+    "ecl": FieldRule(choices=("amb", "blu", "brn", "gry", "grn", "hzl", "oth")),
+    "pid": FieldRule(pattern=r"[0-9]{9}"),
+    "hcl": FieldRule(pattern=r"#[0-9a-f]{6}"),
+    "byr": FieldRule(pattern=r"[0-9]{4}", bounds=(1920, 2002)),
+    "iyr": FieldRule(pattern=r"[0-9]{4}", bounds=(2010, 2020)),
+    "eyr": FieldRule(pattern=r"[0-9]{4}", bounds=(2020, 2030)),
+    "hgt": FieldRule(pattern=r"([0-9]+)(cm|in)", unit_bounds={"cm": (150, 193), "in": (59, 76)}),
+}
+CompiledRules = List[Tuple[str, Callable[[str], bool]]]
+INTEGER_PATTERN: str = r"[0-9]+"  # what a value with bounds but no pattern has to look like
+
+
+def iter_passports(lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """
+    Walk the lines once and yield each passport's {field: value} dict as soon as its terminating
+    blank line (or the end of the input) is reached. Each token is split only once.
+    """
+    passport: Dict[str, str] = {}
+    for line in lines:
+        tokens = line.split()
+        if not tokens:  # blank line, the current passport is complete
+            if passport:
+                yield passport
+            passport = {}
+            continue
+        for token in tokens:
+            field_name, _, value = token.partition(":")
+            passport[field_name] = value
+    if passport:
+        yield passport
+
+
+def read_passports(input_file: Path = INPUT_FILE) -> Iterator[Dict[str, str]]:
+    """Stream passports from the file, which is read line by line and never loaded whole."""
+    with input_file.open() as file:
+        yield from iter_passports(file)
+
+
+def has_required_fields(passport_dict: Dict[str, str]) -> bool:
+    return REQUIRED_FIELDS.issubset(passport_dict)
+
+
+def solution_part_1(inputs: Iterable[Dict[str, str]]) -> int:
+    return sum(has_required_fields(passport_dict) for passport_dict in inputs)
+
+
+def get_rule_cost(rule: FieldRule) -> int:
+    """Rank how expensive a rule is to check: set lookup < regex match < regex match and int()."""
+    if rule.pattern is None and rule.bounds is None:
+        return 0
+    if rule.bounds is None and rule.unit_bounds is None:
+        return 1
+    return 2
+
+
+def compile_rule(rule: FieldRule) -> Callable[[str], bool]:
+    """
+    Turn a rule into a predicate on the field's value, built only from precompiled parts. Raises
+    a ValueError for settings that can't be combined.
+    """
+    if rule.bounds is not None and rule.unit_bounds is not None:
+        raise ValueError("A rule can't have both bounds and unit_bounds")
+    if rule.unit_bounds is not None and (
+        rule.pattern is None or re.compile(rule.pattern).groups < 2
+    ):
+        raise ValueError("A rule with unit_bounds needs a pattern with number and unit groups")
+
+    check_value = compile_value_check(rule)
+    if rule.choices is None:
+        return check_value or (lambda value: True)
+    choices = frozenset(rule.choices)
+    if check_value is None:
+        return choices.__contains__
+    return lambda value: value in choices and check_value(value)
+
+
+def compile_value_check(rule: FieldRule) -> Optional[Callable[[str], bool]]:
+    """Predicate for the pattern and bounds settings of the rule, None if it has neither."""
+    pattern = rule.pattern
+    if pattern is None and rule.bounds is not None:
+        pattern = INTEGER_PATTERN
+    if pattern is None:
+        return None
+
+    regex = re.compile(pattern)
+    if rule.unit_bounds is not None:
+        unit_bounds = dict(rule.unit_bounds)
+
+        def check_unit_bounds(value: str) -> bool:
+            match = regex.fullmatch(value)
+            if match is None:
+                return False
+            number, unit = match.group(1, 2)
+            lower_bound, higher_bound = unit_bounds.get(unit, (1, 0))  # unknown unit: empty range
+            return lower_bound <= int(number) <= higher_bound
+
+        return check_unit_bounds
+
+    if rule.bounds is not None:
+        lower_bound, higher_bound = rule.bounds
+        number_group = 1 if regex.groups else 0
+
+        def check_bounds(value: str) -> bool:
+            match = regex.fullmatch(value)
+            return match is not None and lower_bound <= int(match[number_group]) <= higher_bound
+
+        return check_bounds
+
+    return lambda value: regex.fullmatch(value) is not None
+
+
+def compile_rules(rules: Dict[str, FieldRule] = FIELD_RULES) -> CompiledRules:
+    """
+    Compile a rules table into (field, predicate) pairs, cheapest rules first. Rules of the same
+    cost keep the table's order, which should then list the most selective ones first.
+    """
+    ordered_fields = sorted(rules, key=lambda field_name: get_rule_cost(rules[field_name]))
+    return [(field_name, compile_rule(rules[field_name])) for field_name in ordered_fields]
+
+
+COMPILED_RULES: CompiledRules = compile_rules(FIELD_RULES)
 
 
-def get_fields_from_line(line_input: str) -> Set[str]:
-    elements = shlex.split(line_input)
-    return set([element.split(":")[0] for element in elements])
-
-
-def solution_part_1(inputs: List[str]) -> int:
-    valid_passports = 0
-    for passport_line in inputs:
-        fields = get_fields_from_line(passport_line)
-        if REQUIRED_FIELDS.issubset(fields):
-            valid_passports += 1
-    return valid_passports
-
-
-def get_dict_from_line(line_input: str) -> dict:
-    elements = shlex.split(line_input)
-    return {element.split(":")[0]: element.split(":")[1] for element in elements}
-
-
-def assert_byr_validity(password_dict: dict) -> bool:
-    return 1920 <= int(password_dict["byr"]) <= 2002
-
-
-def assert_iyr_validity(password_dict: dict) -> bool:
-    return 2010 <= int(password_dict["iyr"]) <= 2020
-
-
-def assert_eyr_validity(password_dict: dict) -> bool:
-    return 2020 <= int(password_dict["eyr"]) <= 2030
-
-
-def assert_hgt_validity(password_dict: dict) -> bool:
-    if password_dict["hgt"].strip("0123456789") == "cm":
-        return 150 <= int(password_dict["hgt"].strip("cm")) <= 193
-    else:
-        return 59 <= int(password_dict["hgt"].strip("in")) <= 76
-
-
-def assert_hcl_validity(password_dict: dict) -> bool:
-    if not password_dict["hcl"][0] == "#":
-        return False
-    if not len(password_dict["hcl"][1:]) == 6:
-        return False
-    return all(
-        char in ("0 1 2 3 4 5 6 7 8 9 a b c d e f".split(" ")) for char in password_dict["hcl"][1:]
-    )
-
-
-def assert_ecl_validity(password_dict: dict) -> bool:
-    return password_dict["ecl"] in ("amb", "blu", "brn", "gry", "grn", "hzl", "oth")
-
-
-def assert_pid_validity(password_dict: dict) -> bool:
-    if len(password_dict["pid"]) != 9:
-        return False
-    try:
-        _ = int(password_dict["pid"])
-    except ValueError:
+def has_valid_fields(
+    passport_dict: Dict[str, str], compiled_rules: CompiledRules = COMPILED_RULES
+) -> bool:
+    """Check the passport against the compiled rules, stopping at the first failing one."""
+    if not has_required_fields(passport_dict):
         return False
+    for field_name, predicate in compiled_rules:
+        value = passport_dict.get(field_name)
+        if value is None or not predicate(value):
+            return False
     return True
 
 
-def solution_part_2(inputs: List[str]) -> int:
-    valid_passwords = 0
-    for passport_line in inputs:
-        if REQUIRED_FIELDS.issubset(get_fields_from_line(passport_line)):
-            passport_dict = get_dict_from_line(passport_line)
-            if all(
-                [
-                    assert_byr_validity(passport_dict),
-                    assert_iyr_validity(passport_dict),
-                    assert_eyr_validity(passport_dict),
-                    assert_hgt_validity(passport_dict),
-                    assert_hcl_validity(passport_dict),
-                    assert_ecl_validity(passport_dict),
-                    assert_pid_validity(passport_dict),
-                ]
-            ):
-                valid_passwords += 1
-    return valid_passwords
+def solution_part_2(
+    inputs: Iterable[Dict[str, str]], compiled_rules: CompiledRules = COMPILED_RULES
+) -> int:
+    return sum(has_valid_fields(passport_dict, compiled_rules) for passport_dict in inputs)
+
+
+def count_valid_passports(passports: Iterable[Dict[str, str]]) -> Tuple[int, int]:
+    """Return the counts of valid passports for both parts, consuming the stream only once."""
+    valid_part_1, valid_part_2 = 0, 0
+    for passport_dict in passports:
+        if has_required_fields(passport_dict):
+            valid_part_1 += 1
+            valid_part_2 += has_valid_fields(passport_dict)
+    return valid_part_1, valid_part_2
+
+
+@dataclass
+class ValidationTally:
+    """
+    Statistics of a passports batch: how many passports there are, how many are valid, and
+    per-field outcomes counted as {(field, "valid" | "invalid" | "missing"): count}.
+    """
+
+    passports: int = 0
+    valid: int = 0
+    outcomes: Counter = field(default_factory=Counter)
+
+    def merge(self, other: "ValidationTally") -> "ValidationTally":
+        self.passports += other.passports
+        self.valid += other.valid
+        self.outcomes.update(other.outcomes)
+        return self
+
+
+def tally_passports(
+    passports: Iterable[Dict[str, str]], compiled_rules: CompiledRules = COMPILED_RULES
+) -> ValidationTally:
+    """Check every rule on every passport, without short-circuiting, to tally all outcomes."""
+    tally = ValidationTally()
+    predicates = dict(compiled_rules)
+    fields = sorted(REQUIRED_FIELDS.union(predicates))
+    for passport_dict in passports:
+        passport_is_valid = True
+        for field_name in fields:
+            value = passport_dict.get(field_name)
+            if value is None:
+                outcome = "missing"
+            elif field_name in predicates and not predicates[field_name](value):
+                outcome = "invalid"
+            else:
+                outcome = "valid"
+            tally.outcomes[(field_name, outcome)] += 1
+            passport_is_valid = passport_is_valid and outcome == "valid"
+        tally.passports += 1
+        tally.valid += passport_is_valid
+    return tally
+
+
+def tally_passport_lines(
+    lines: List[str], rules: Dict[str, FieldRule] = FIELD_RULES
+) -> ValidationTally:
+    """Worker side of the batch mode, rules are compiled here as compiled ones can't be pickled."""
+    return tally_passports(iter_passports(lines), compile_rules(rules))
+
+
+def iter_record_chunks(lines: Iterable[str], records_per_chunk: int) -> Iterator[List[str]]:
+    """Group lines in chunks of records_per_chunk complete passports, cut at blank lines."""
+    chunk: List[str] = []
+    records = 0
+    for line in lines:
+        chunk.append(line)
+        if not line.strip():
+            records += 1
+            if records >= records_per_chunk:
+                yield chunk
+                chunk, records = [], 0
+    if chunk:
+        yield chunk
+
+
+def tally_passports_parallel(
+    input_file: Path = INPUT_FILE,
+    workers: Optional[int] = None,
+    records_per_chunk: int = 10_000,
+    rules: Dict[str, FieldRule] = FIELD_RULES,
+) -> ValidationTally:
+    """
+    Tally the file's passports with chunks of records validated across a process pool, and the
+    workers' tallies merged into one. Only a few chunks per worker are kept in flight at a time
+    so that memory usage stays bounded. Defaults to one worker per CPU core.
+    """
+    workers = workers or os.cpu_count() or 1
+    tally = ValidationTally()
+    with input_file.open() as file, ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in iter_record_chunks(file, records_per_chunk):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tally.merge(future.result())
+            pending.add(executor.submit(tally_passport_lines, chunk, rules))
+        for future in pending:
+            tally.merge(future.result())
+    return tally
+
+
+@dataclass
+class PassportStore:
+    """
+    Columnar store of a passports corpus. Each known field has a column holding one code per
+    passport: 0 if the field is missing, i + 1 if its value is vocabularies[field][i]. Presence of
+    each field is kept as a bitmap integer, with bit i set if the i-th passport has that field.
+    """
+
+    size: int
+    vocabularies: Dict[str, List[str]]
+    columns: Dict[str, array]
+    presence: Dict[str, int]
+
+
+def flags_to_bitmap(flags: bytes) -> int:
+    """Turn a sequence of 0 / 1 bytes into an integer with bit i set if flags[i] is 1."""
+    return int(flags.translate(FLAG_DIGITS)[::-1], 2) if flags else 0
+
+
+def count_bits(bitmap: int) -> int:
+    return bin(bitmap).count("1")
+
+
+def get_field_mask(store: PassportStore, field_name: str, predicate: Callable[[str], bool]) -> int:
+    """
+    Return the bitmap of passports having field_name with a value satisfying the predicate. The
+    predicate runs once per distinct value, then its results are gathered along the column.
+    """
+    vocabulary = store.vocabularies[field_name]
+    accepted_codes = bytes([0] + [bool(predicate(value)) for value in vocabulary])
+    return flags_to_bitmap(bytes(map(accepted_codes.__getitem__, store.columns[field_name])))
+
+
+def build_passport_store(passports: Iterable[Dict[str, str]]) -> PassportStore:
+    """Intern every passport's known fields into the columns of a new PassportStore."""
+    codes: Dict[str, Dict[str, int]] = {field_name: {} for field_name in KNOWN_FIELDS}
+    columns = {field_name: array("I") for field_name in KNOWN_FIELDS}
+    size = 0
+    for passport_dict in passports:
+        for field_name in KNOWN_FIELDS:
+            value = passport_dict.get(field_name)
+            field_codes = codes[field_name]
+            if value is None:
+                columns[field_name].append(0)
+            else:
+                columns[field_name].append(field_codes.setdefault(value, len(field_codes) + 1))
+        size += 1
+    vocabularies = {field_name: list(codes[field_name]) for field_name in KNOWN_FIELDS}
+    return make_passport_store(size, vocabularies, columns)
+
+
+def make_passport_store(
+    size: int, vocabularies: Dict[str, List[str]], columns: Dict[str, array]
+) -> PassportStore:
+    store = PassportStore(size=size, vocabularies=vocabularies, columns=columns, presence={})
+    store.presence = {
+        field_name: get_field_mask(store, field_name, lambda value: True) for field_name in columns
+    }
+    return store
+
+
+def save_passport_store(store: PassportStore, output_file: Path) -> None:
+    """
+    Write the store as a length-prefixed JSON header (size, byte order, vocabularies) followed by
+    the raw bytes of each column, in the header's fields order.
+    """
+    fields = list(store.columns)
+    header = {
+        "size": store.size,
+        "byteorder": sys.byteorder,
+        "itemsize": array("I").itemsize,
+        "fields": fields,
+        "vocabularies": store.vocabularies,
+    }
+    header_bytes = json.dumps(header).encode()
+    with output_file.open("wb") as file:
+        file.write(struct.pack("<Q", len(header_bytes)))
+        file.write(header_bytes)
+        for field_name in fields:
+            store.columns[field_name].tofile(file)
+
+
+def load_passport_store(input_file: Path) -> PassportStore:
+    """Read back a store written by save_passport_store, without any text parsing."""
+    with input_file.open("rb") as file:
+        (header_length,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(header_length))
+        if header["itemsize"] != array("I").itemsize:
+            raise ValueError("The store was saved on a platform with a different column item size")
+        columns = {}
+        for field_name in header["fields"]:
+            column = array("I")
+            column.fromfile(file, header["size"])
+            if header["byteorder"] != sys.byteorder:
+                column.byteswap()
+            columns[field_name] = column
+    return make_passport_store(header["size"], header["vocabularies"], columns)
+
+
+def count_store_required_fields(store: PassportStore) -> int:
+    """Part 1 policy on the store: AND the required fields' presence bitmaps."""
+    mask = (1 << store.size) - 1
+    for field_name in REQUIRED_FIELDS:
+        mask &= store.presence.get(field_name, 0)
+    return count_bits(mask)
+
+
+def count_store_valid_fields(
+    store: PassportStore, compiled_rules: CompiledRules = COMPILED_RULES
+) -> int:
+    """Part 2 policy on the store: AND the presence and rule bitmaps of all checked fields."""
+    mask = (1 << store.size) - 1
+    for field_name in REQUIRED_FIELDS:
+        mask &= store.presence.get(field_name, 0)
+    for field_name, predicate in compiled_rules:
+        if not mask:  # no passport left to validate
+            break
+        mask &= get_field_mask(store, field_name, predicate) if field_name in store.columns else 0
+    return count_bits(mask)
 
 
 if __name__ == "__main__":
-    print(f"Solution for part 1:  {solution_part_1(PASSPORT_LINES)}")
-    print(f"Solution for part 2:  {solution_part_2(PASSPORT_LINES)}")
+    part_1, part_2 = count_valid_passports(read_passports(INPUT_FILE))
+    print(f"Solution for part 1:  {part_1}")
+    print(f"Solution for part 2:  {part_2}")
@@ -67,37 +67,79 @@ be in your list.
 
 What is the ID of your seat?
 """
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from itertools import repeat
 from pathlib import Path
-from typing import List
+from typing import Iterable, List, Optional, Tuple
 
 INPUT_FILE: Path = Path(__file__).parent / "input.txt"
 INPUT_LINES: List[str] = INPUT_FILE.read_text().split("\n")
+SEAT_BITS = str.maketrans("FBLR", "0101")  # lower half is a 0 bit, upper half is a 1 bit
+SEAT_BITS_BYTES = bytes.maketrans(b"FBLR", b"0101")
+
+
+@dataclass(frozen=True)
+class SeatMap:
+    """Plane geometry, both numbers of rows and of columns have to be powers of two."""
+
+    rows: int = 128
+    columns: int = 8
+
+    def __post_init__(self):
+        for amount in (self.rows, self.columns):
+            if amount < 1 or amount & (amount - 1):
+                raise ValueError(f"Seat map dimensions must be powers of two, got {amount}")
+
+    @property
+    def row_bits(self) -> int:
+        return self.rows.bit_length() - 1
+
+    @property
+    def column_bits(self) -> int:
+        return self.columns.bit_length() - 1
+
+
+PLANE: SeatMap = SeatMap(rows=128, columns=8)
 
 
 def get_row_number(column_str: str) -> int:
-    start, end = 0, 127
-    for char in column_str:
-        if char == "F":
-            end = int((start + end + 1) / 2) - 1
-        elif char == "B":
-            start = int((start + end + 1) / 2)
-    return start
+    return int(column_str.translate(SEAT_BITS), 2)
 
 
 def get_column_number(row_str: str) -> int:
-    start, end = 0, 7
-    for char in row_str:
-        if char == "L":
-            end = int((start + end + 1) / 2) - 1
-        elif char == "R":
-            start = int((start + end + 1) / 2)
-    return start
+    return int(row_str.translate(SEAT_BITS), 2)
+
+
+def decode_seat(seat_str: str, geometry: SeatMap = PLANE) -> Tuple[int, int]:
+    """
+    Return the row and column of a boarding pass for the given plane geometry. A single row or
+    column takes no character in the pass, and is number 0.
+    """
+    if len(seat_str) != geometry.row_bits + geometry.column_bits:
+        raise ValueError(f"Invalid boarding pass '{seat_str}' for {geometry}")
+    row_str, column_str = seat_str[: geometry.row_bits], seat_str[geometry.row_bits :]
+    row = get_row_number(row_str) if row_str else 0
+    column = get_column_number(column_str) if column_str else 0
+    return row, column
+
 
+def get_seat_id(seat_str: str, geometry: SeatMap = PLANE) -> int:
+    """
+    With power of two dimensions, the row * columns + column seat ID is just the whole boarding
+    pass read as a binary number.
+    """
+    row, column = decode_seat(seat_str, geometry)
+    return row * geometry.columns + column
 
-def get_seat_id(seat_str: str) -> int:
-    row = get_row_number(seat_str[:7])
-    column = get_column_number(seat_str[7:])
-    return row * 8 + column
+
+def decode_seat_ids(data: bytes) -> array:
+    """
+    Decode all boarding passes of the raw file content at once: translate the whole buffer to
+    binary digits in one call, then parse every pass with int() mapped over the buffer's lines.
+    """
+    return array("L", map(int, data.translate(SEAT_BITS_BYTES).split(), repeat(2)))
 
 
 def solution_part_1(inputs: List[str]) -> int:
@@ -105,9 +147,117 @@ def solution_part_1(inputs: List[str]) -> int:
     return max(seats)
 
 
+def find_missing_seats(seat_ids: Iterable[int]) -> List[int]:
+    """
+    Return every free seat ID between the lowest and highest occupied ones, in increasing order.
+    Occupancy is filled in a single pass into a bytearray, then scanned for zeros.
+    """
+    seat_ids = seat_ids if isinstance(seat_ids, Sequence) else list(seat_ids)
+    if not seat_ids:
+        return []
+    lowest = min(seat_ids)
+    occupancy = bytearray(max(seat_ids) - lowest + 1)
+    for seat_id in seat_ids:
+        occupancy[seat_id - lowest] = 1
+
+    missing_seats: List[int] = []
+    position = occupancy.find(0)
+    while position != -1:
+        missing_seats.append(lowest + position)
+        position = occupancy.find(0, position + 1)
+    return missing_seats
+
+
+def find_single_missing_seat(seat_ids: Iterable[int]) -> int:
+    """
+    When exactly one seat is free between the lowest and highest occupied ones, find it in one
+    pass and O(1) memory: it is the difference between the expected and actual sums of seat IDs.
+    """
+    lowest, highest, total, count = None, None, 0, 0
+    for seat_id in seat_ids:
+        lowest = seat_id if lowest is None else min(lowest, seat_id)
+        highest = seat_id if highest is None else max(highest, seat_id)
+        total += seat_id
+        count += 1
+    if lowest is None or highest - lowest != count:
+        raise ValueError("There should be exactly one free seat in the range of occupied seats")
+    return (lowest + highest) * (highest - lowest + 1) // 2 - total
+
+
 def solution_part_2(inputs: List[str]) -> int:
     seats: List[int] = [get_seat_id(seat_str) for seat_str in inputs]
-    return [seat for seat in range(min(seats), max(seats)) if seat not in seats][0]
+    return find_missing_seats(seats)[0]
+
+
+class OccupancyIndex:
+    """
+    Live index of occupied seats, backed by a Fenwick tree over seat IDs so that boarding passes
+    can be added one at a time while range counts and free seat searches stay O(log n).
+    """
+
+    def __init__(self, geometry: SeatMap = PLANE):
+        self.geometry = geometry
+        self.size = geometry.rows * geometry.columns
+        self._occupied = bytearray(self.size)
+        self._tree = array("L", [0]) * (self.size + 1)  # 1-indexed, seat ID i is at i + 1
+
+    def add_seat(self, seat_id: int) -> bool:
+        """Mark the seat as occupied, return False if it already was."""
+        if not 0 <= seat_id < self.size:
+            raise ValueError(f"Seat ID {seat_id} is not on the plane")
+        if self._occupied[seat_id]:
+            return False
+        self._occupied[seat_id] = 1
+        position = seat_id + 1
+        while position <= self.size:
+            self._tree[position] += 1
+            position += position & -position
+        return True
+
+    def add_boarding_pass(self, seat_str: str) -> int:
+        """Mark the boarding pass' seat as occupied and return its seat ID."""
+        seat_id = get_seat_id(seat_str, self.geometry)
+        self.add_seat(seat_id)
+        return seat_id
+
+    def _count_up_to(self, seat_id: int) -> int:
+        """Number of occupied seats with an ID lower or equal to seat_id."""
+        total, position = 0, min(seat_id + 1, self.size)
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def occupied_between(self, first_id: int, last_id: int) -> int:
+        """Number of occupied seats with IDs in the [first_id, last_id] range."""
+        if last_id < first_id:
+            return 0
+        return self._count_up_to(last_id) - self._count_up_to(first_id - 1)
+
+    def occupied_in_rows(self, first_row: int, last_row: int) -> int:
+        """Number of occupied seats in rows first_row to last_row, both included."""
+        columns = self.geometry.columns
+        return self.occupied_between(first_row * columns, (last_row + 1) * columns - 1)
+
+    def next_free_seat(self, after_id: int = -1) -> Optional[int]:
+        """
+        Return the lowest free seat ID strictly above after_id, or None if there is none. This
+        walks down the tree for the first position where the count of free seats since the start
+        exceeds the one up to after_id.
+        """
+        after_id = max(after_id, -1)
+        if after_id >= self.size - 1:
+            return None
+        target = (after_id + 1) - self._count_up_to(after_id) + 1  # free seats in [0, answer]
+        position, step = 0, self.size  # size is a power of two
+        while step:
+            if position + step <= self.size:
+                block_free = step - self._tree[position + step]
+                if block_free < target:
+                    position += step
+                    target -= block_free
+            step >>= 1
+        return position if position < self.size else None  # position is answer's 1-indexed - 1
 
 
 if __name__ == "__main__":
@@ -93,37 +93,157 @@ In this example, the sum of these counts is 3 + 0 + 1 + 1 + 1 = 6.
 For each group, count the number of questions to which everyone answered "yes". What is the sum
 of those counts?
 """
-from collections import Counter
+from array import array
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
-from typing import List
+from string import ascii_lowercase
+from typing import Callable, Iterable, Iterator, List, Tuple
 
 INPUT_FILE: Path = Path(__file__).parent / "input.txt"
-GROUP_LETTERS: List[str] = [
-    group_str.replace("\n", "") for group_str in INPUT_FILE.read_text().split("\n\n")
-]
-GROUPS_LISTS: List[List[str]] = [
-    group.split("\n") for group in INPUT_FILE.read_text().split("\n\n")
-]
+LETTER_BITS = {letter: 1 << index for index, letter in enumerate(ascii_lowercase)}
+ALL_LETTERS_MASK: int = (1 << len(ascii_lowercase)) - 1
+N_QUESTIONS: int = len(ascii_lowercase)
+LETTER_CODES: bytes = bytes.maketrans(ascii_lowercase.encode(), bytes(range(N_QUESTIONS)))
+
+
+def get_answers_mask(answers: str) -> int:
+    """Encode a person's answers as a 26 bits integer, with bit i set if letter i was answered."""
+    mask = 0
+    for letter in answers:
+        mask |= LETTER_BITS[letter]
+    return mask
+
+
+def count_bits(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def iter_group_masks(lines: Iterable[str]) -> Iterator[Tuple[int, int]]:
+    """
+    Yield, for each group, the masks of questions answered by anyone (OR of its people's masks)
+    and by everyone (AND of its people's masks). Groups are separated by blank lines.
+    """
+    anyone, everyone, group_size = 0, ALL_LETTERS_MASK, 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if group_size:
+                yield anyone, everyone
+            anyone, everyone, group_size = 0, ALL_LETTERS_MASK, 0
+            continue
+        mask = get_answers_mask(line)
+        anyone |= mask
+        everyone &= mask
+        group_size += 1
+    if group_size:
+        yield anyone, everyone
+
+
+@dataclass
+class CustomsAnswers:
+    """
+    Flattened answers of many groups: letters holds every answer as a 0-25 letter code, the i-th
+    person answered letters[person_offsets[i] : person_offsets[i + 1]] and the j-th group is made
+    of persons group_offsets[j] to group_offsets[j + 1] (excluded).
+    """
+
+    letters: array
+    person_offsets: array
+    group_offsets: array
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.group_offsets) - 1
+
+
+def load_customs_answers(lines: Iterable[str]) -> CustomsAnswers:
+    """Flatten all groups' answers into a CustomsAnswers, in a single pass over the lines."""
+    letters, person_offsets, group_offsets = array("B"), array("L", [0]), array("L", [0])
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if group_offsets[-1] != len(person_offsets) - 1:  # close the group if it has people
+                group_offsets.append(len(person_offsets) - 1)
+            continue
+        letters.frombytes(line.encode("ascii"))
+        person_offsets.append(len(letters))
+    if group_offsets[-1] != len(person_offsets) - 1:
+        group_offsets.append(len(person_offsets) - 1)
+    raw_letters = letters.tobytes()
+    if raw_letters.translate(None, ascii_lowercase.encode()):  # something else than a-z is left
+        raise ValueError("Answers can only be lowercase letters from a to z")
+    letters = array("B", raw_letters.translate(LETTER_CODES))
+    return CustomsAnswers(letters, person_offsets, group_offsets)
+
+
+def get_letter_counts(answers: CustomsAnswers) -> array:
+    """
+    Return the groups x questions matrix of how many people of each group answered each question,
+    flattened row-wise: the count for group j and letter code i is at j * N_QUESTIONS + i.
+    """
+    counts = array("L", [0]) * (answers.n_groups * N_QUESTIONS)
+    letters, person_offsets = answers.letters, answers.person_offsets
+    for group, (first_person, end_person) in enumerate(
+        zip(answers.group_offsets, islice(answers.group_offsets, 1, None))
+    ):
+        row_start = group * N_QUESTIONS
+        for letter in letters[person_offsets[first_person] : person_offsets[end_person]]:
+            counts[row_start + letter] += 1
+    return counts
+
+
+def get_group_sizes(answers: CustomsAnswers) -> array:
+    group_offsets = answers.group_offsets
+    group_ends = islice(group_offsets, 1, None)
+    return array("L", (end - start for start, end in zip(group_offsets, group_ends)))
+
+
+def get_question_histogram(letter_counts: array) -> List[int]:
+    """Return how many people answered each question, over all groups."""
+    return [sum(letter_counts[letter::N_QUESTIONS]) for letter in range(N_QUESTIONS)]
+
+
+def count_questions_per_group(
+    letter_counts: array, group_sizes: array, condition: Callable[[int, int], bool]
+) -> array:
+    """
+    For each group, count the questions whose number of answers satisfies the condition, which is
+    called with that number and the group's size.
+    """
+    row_starts = range(0, len(letter_counts), N_QUESTIONS)
+    return array(
+        "L",
+        (
+            sum(condition(count, size) for count in letter_counts[start : start + N_QUESTIONS])
+            for start, size in zip(row_starts, group_sizes)
+        ),
+    )
+
+
+def answered_by_anyone(letter_counts: array, group_sizes: array) -> array:
+    return count_questions_per_group(letter_counts, group_sizes, lambda count, size: count > 0)
+
+
+def answered_by_everyone(letter_counts: array, group_sizes: array) -> array:
+    return count_questions_per_group(letter_counts, group_sizes, lambda count, size: count == size)
+
+
+def answered_by_exactly(letter_counts: array, group_sizes: array, k: int) -> array:
+    return count_questions_per_group(letter_counts, group_sizes, lambda count, size: count == k)
 
 
-def solution_part_1(inputs: List[str]) -> int:
-    return sum([len(set(group_str)) for group_str in inputs])
+GROUP_MASKS: List[Tuple[int, int]] = list(iter_group_masks(INPUT_FILE.read_text().split("\n")))
 
 
-def solution_part_2(inputs: List[str]) -> int:
-    result = 0
-    for group_list in inputs:
-        all_answered = 0
-        group_members = len(group_list)
-        group_str = "".join(group_list)
-        counts = Counter(group_str)
-        for letter, count in counts.items():
-            if count == group_members:
-                all_answered += 1
-        result += all_answered
-    return result
+def solution_part_1(inputs: List[Tuple[int, int]]) -> int:
+    return sum(count_bits(anyone) for anyone, _ in inputs)
+
+
+def solution_part_2(inputs: List[Tuple[int, int]]) -> int:
+    return sum(count_bits(everyone) for _, everyone in inputs)
 
 
 if __name__ == "__main__":
-    print(f"Solution for part 1:  {solution_part_1(GROUP_LETTERS)}")
-    print(f"Solution for part 2:  {solution_part_2(GROUPS_LISTS)}")
+    print(f"Solution for part 1:  {solution_part_1(GROUP_MASKS)}")
+    print(f"Solution for part 2:  {solution_part_2(GROUP_MASKS)}")
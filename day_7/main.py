@@ -75,75 +75,376 @@ In this example, a single shiny gold bag must contain 126 other bags.
 
 How many individual bags are required inside your single shiny gold bag?
 """
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from itertools import compress, count, repeat
+from operator import itemgetter, ne, sub
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 INPUT_FILE: Path = Path(__file__).parent / "input.txt"
 INPUT_LINES: List[str] = INPUT_FILE.read_text().split("\n")
+CACHE_DIRECTORY: Path = Path(__file__).parent / ".bag_graph_cache"
 
+# Either the start of a rule with the container bag, or one of its contents with its quantity
+RULE_REGEX = re.compile(r"^(\w+ \w+) bags contain|(\d+) (\w+ \w+) bags?", re.MULTILINE)
 
-def check_bag(bag_rules: dict, checked_bag: str, current_bag: str):
-    if current_bag == checked_bag:
-        return 1
-    if not bag_rules.get(current_bag):
-        return 0
-    else:
-        counts = []
-        for k, v in bag_rules[current_bag].items():
-            counts.append(check_bag(bag_rules, checked_bag, k))
-        return max(counts)
+
+def iter_rule_edges(text: str) -> Iterator[Tuple[str, Optional[str], int]]:
+    """
+    Scan the rules text once, yielding (container, None, 0) at the start of each rule so that
+    bags without contents are seen, then (container, inner bag, quantity) for each content.
+    """
+    container = None
+    for new_container, quantity, inner_bag in RULE_REGEX.findall(text):
+        if new_container:
+            container = new_container
+            yield container, None, 0
+        elif container is not None:
+            yield container, inner_bag, int(quantity)
 
 
 def get_bag_rules(inputs: List[str]) -> dict:
     """
     Return a dictionnary with different bags as keys and as values a dictionnary of their rule
-    content (bags as keys, amount as values), recursively collected.
-    """
-    bag_names = []
-    all_rules = {}
-    for line in inputs:
-        bag = " ".join(line.split(" ")[:2])
-        contents = line[line.index("contain") + 8 : -1].split(",")  # all after 'contains'
-        contents = [cnt.lstrip() for cnt in contents]  # get them in a list
-        contents = [" ".join(cont.split(" ")[:-1]) for cont in contents]  # remove 'bags' for each
-        contents = {
-            " ".join(cont.split(" ")[1:]): cont.split(" ")[0] for cont in contents
-        }  # get {bad: quantity} for each of these bags
-
-        if bag not in bag_names:
-            bag_names.append(bag)
-        if all_rules.get(bag):
-            contents.update(all_rules[bag])
-        all_rules[bag] = contents
-
-    for bag, rules in all_rules.items():
-        if rules == {"other": "no"}:  # replace empty bad contents from {'other': 'no'} to {}
-            all_rules[bag] = {}
-    for bag, rules in all_rules.items():
-        all_rules[bag] = {k: int(v) for k, v in rules.items()}  # convert values to int
+    content (bags as keys, amount as values).
+    """
+    all_rules: Dict[str, Dict[str, int]] = {}
+    for bag, inner_bag, quantity in iter_rule_edges("\n".join(inputs)):
+        contents = all_rules.setdefault(bag, {})
+        if inner_bag is not None:
+            contents.setdefault(inner_bag, quantity)  # first rule for a bag wins on duplicates
     return all_rules
 
 
+@dataclass
+class BagGraph:
+    """
+    Compressed sparse row representation of the rules, with bags interned to integer IDs. Bag i
+    is colors[i] and directly contains quantities[j] bags of ID targets[j], for j in the range
+    offsets[i] to offsets[i + 1] (excluded).
+    """
+
+    colors: List[str]
+    offsets: array
+    targets: array
+    quantities: array
+
+    def get_color_ids(self) -> Dict[str, int]:
+        return {color: bag_id for bag_id, color in enumerate(self.colors)}
+
+
+def parse_bag_graph(text: str) -> BagGraph:
+    """
+    Build the BagGraph of the rules text from a single regex scan, with the work on each edge done
+    by map / filter chains over the matches rather than a Python loop. Containers are numbered
+    first and in rule order, so that edges already come out grouped by bag ID. As in
+    get_bag_rules, the first rule giving a bag's quantity of some inner bag wins on duplicates,
+    which are handed to merge_bag_rules.
+    """
+    matches = RULE_REGEX.findall(text)
+    containers = list(map(itemgetter(0), matches))
+    first_rule = next(compress(count(), containers), len(matches))
+    if first_rule:  # contents found before any rule have no container, like in iter_rule_edges
+        matches, containers = matches[first_rule:], containers[first_rule:]
+
+    color_ids: Dict[str, int] = defaultdict(count().__next__)  # unseen colors get the next ID
+    rule_ids = array("L", map(color_ids.__getitem__, filter(None, containers)))
+    has_repeated_container = len(color_ids) < len(rule_ids)
+    targets = array("L", map(color_ids.__getitem__, filter(None, map(itemgetter(2), matches))))
+    quantities = array("Q", map(int, filter(None, map(itemgetter(1), matches))))
+    offsets = array("L", map(sub, compress(count(), containers), count()))  # edges before a rule
+    offsets.append(len(targets))
+
+    rule_sizes = map(sub, offsets[1:], offsets[:-1])
+    rule_targets = map(targets.__getitem__, map(slice, offsets[:-1], offsets[1:]))
+    if has_repeated_container or any(map(ne, map(len, map(set, rule_targets)), rule_sizes)):
+        return merge_bag_rules(list(color_ids), rule_ids, offsets, targets, quantities)
+    offsets.extend(repeat(len(targets), len(color_ids) - len(rule_ids)))  # bags without a rule
+    return BagGraph(list(color_ids), offsets, targets, quantities)
+
+
+def merge_bag_rules(
+    colors: List[str], rule_ids: array, rule_offsets: array, targets: array, quantities: array
+) -> BagGraph:
+    """
+    Build the BagGraph from edges given rule by rule, where a bag may have several rules or list
+    the same inner bag twice: the first quantity given for each (bag, inner bag) pair is kept.
+    """
+    contents_per_bag: List[Dict[int, int]] = [{} for _ in colors]
+    for rule, bag_id in enumerate(rule_ids):
+        contents = contents_per_bag[bag_id]
+        for edge in range(rule_offsets[rule], rule_offsets[rule + 1]):
+            contents.setdefault(targets[edge], quantities[edge])
+
+    offsets, merged_targets, merged_quantities = array("L", [0]), array("L"), array("Q")
+    for contents in contents_per_bag:
+        merged_targets.extend(contents)
+        merged_quantities.extend(contents.values())
+        offsets.append(len(merged_targets))
+    return BagGraph(colors, offsets, merged_targets, merged_quantities)
+
+
+def save_bag_graph(graph: BagGraph, output_file: Path) -> None:
+    """
+    Write the graph as a length-prefixed JSON header (colors, byte order, array sizes) followed
+    by the raw bytes of the offsets, targets and quantities arrays.
+    """
+    header = {
+        "colors": graph.colors,
+        "byteorder": sys.byteorder,
+        "typecodes": [graph.offsets.typecode, graph.targets.typecode, graph.quantities.typecode],
+        "itemsizes": [graph.offsets.itemsize, graph.targets.itemsize, graph.quantities.itemsize],
+        "n_edges": len(graph.targets),
+    }
+    header_bytes = json.dumps(header).encode()
+    with output_file.open("wb") as file:
+        file.write(struct.pack("<Q", len(header_bytes)))
+        file.write(header_bytes)
+        for column in (graph.offsets, graph.targets, graph.quantities):
+            column.tofile(file)
+
+
+def load_bag_graph(input_file: Path) -> BagGraph:
+    """Read back a graph written by save_bag_graph."""
+    with input_file.open("rb") as file:
+        (header_length,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(header_length))
+        lengths = (len(header["colors"]) + 1, header["n_edges"], header["n_edges"])
+        columns = []
+        for typecode, itemsize, length in zip(header["typecodes"], header["itemsizes"], lengths):
+            column = array(typecode)
+            if column.itemsize != itemsize:
+                raise ValueError("The graph was saved on a platform with different item sizes")
+            column.fromfile(file, length)
+            if header["byteorder"] != sys.byteorder:
+                column.byteswap()
+            columns.append(column)
+    return BagGraph(header["colors"], *columns)
+
+
+def get_bag_graph(
+    input_file: Path = INPUT_FILE, cache_directory: Path = CACHE_DIRECTORY
+) -> BagGraph:
+    """
+    Return the BagGraph of the rules file, loaded from the cache directory if this exact input has
+    been compiled before (keyed by the SHA-256 of its content), parsed and cached otherwise.
+    """
+    data = input_file.read_bytes()
+    cache_file = cache_directory / f"{hashlib.sha256(data).hexdigest()}.bin"
+    if cache_file.is_file():
+        return load_bag_graph(cache_file)
+
+    graph = parse_bag_graph(data.decode())
+    cache_directory.mkdir(parents=True, exist_ok=True)
+    file_descriptor, temporary_name = tempfile.mkstemp(dir=cache_directory, suffix=".tmp")
+    os.close(file_descriptor)
+    try:  # write aside then rename, so that no reader ever sees a partially written cache file
+        save_bag_graph(graph, Path(temporary_name))
+        os.replace(temporary_name, cache_file)
+    finally:
+        if os.path.exists(temporary_name):
+            os.remove(temporary_name)
+    return graph
+
+
+def get_reverse_rules(bag_rules: dict) -> Dict[str, Set[str]]:
+    """Return the 'contained by' index: for each bag, the set of bags directly containing it."""
+    reverse_rules: Dict[str, Set[str]] = {bag: set() for bag in bag_rules}
+    for bag, contents in bag_rules.items():
+        for inner_bag in contents:
+            reverse_rules.setdefault(inner_bag, set()).add(bag)
+    return reverse_rules
+
+
+def get_containing_bags(reverse_rules: Dict[str, Set[str]], target: str) -> Set[str]:
+    """Return all bags eventually containing the target, by BFS over the 'contained by' index."""
+    containing_bags: Set[str] = set()
+    queue = deque([target])
+    while queue:
+        for container in reverse_rules.get(queue.popleft(), ()):
+            if container not in containing_bags:
+                containing_bags.add(container)
+                queue.append(container)
+    return containing_bags
+
+
+def can_contain(
+    bag_rules: dict,
+    container: str,
+    target: str,
+    cache: Optional[Dict[Tuple[str, str], bool]] = None,
+) -> bool:
+    """
+    Whether the container bag eventually holds the target bag. Answers for every bag visited on
+    the way are stored in the cache, to be reused when asking many questions of the same rules.
+    Raises a ValueError describing the cycle if the rules explored contain one.
+    """
+    cache = {} if cache is None else cache
+    if (container, target) in cache:
+        return cache[(container, target)]
+    on_path: Set[str] = {container}  # bags of the current DFS path, to detect cycles
+    stack = [(container, iter(bag_rules.get(container, {})))]
+    while stack:
+        bag, inner_bags = stack[-1]
+        for inner_bag in inner_bags:
+            if inner_bag in on_path:
+                path = [path_bag for path_bag, _ in stack]
+                cycle = path[path.index(inner_bag) :] + [inner_bag]
+                raise ValueError(f"Bag rules contain a cycle: {' -> '.join(cycle)}")
+            if (inner_bag, target) not in cache:
+                on_path.add(inner_bag)
+                stack.append((inner_bag, iter(bag_rules.get(inner_bag, {}))))
+                break
+        else:  # all inner bags have been answered
+            cache[(bag, target)] = any(
+                inner_bag == target or cache.get((inner_bag, target), False)
+                for inner_bag in bag_rules.get(bag, {})
+            )
+            on_path.discard(bag)
+            stack.pop()
+    return cache[(container, target)]
+
+
+def count_bits(bitset: int) -> int:
+    return bin(bitset).count("1")
+
+
+def iter_bits(bitset: int) -> Iterator[int]:
+    """Yield the positions of the set bits of the integer, lowest first."""
+    while bitset:
+        lowest_bit = bitset & -bitset
+        yield lowest_bit.bit_length() - 1
+        bitset ^= lowest_bit
+
+
+class BagIndex:
+    """
+    Query service over a BagGraph, with everything precomputed once at construction: for each
+    bag, the bitsets (as Python integers, bit i for bag ID i) of all bags it eventually contains
+    and of all bags eventually containing it, and its total contents count. Memory for the
+    bitsets grows quadratically with the number of colors.
+    """
+
+    def __init__(self, graph: BagGraph):
+        self.graph = graph
+        self.color_ids = graph.get_color_ids()
+        n_bags = len(graph.colors)
+        children = {
+            bag_id: graph.targets[graph.offsets[bag_id] : graph.offsets[bag_id + 1]]
+            for bag_id in range(n_bags)
+        }
+        order: List[int] = get_topological_order(children, graph.colors)  # contents come first
+
+        self.descendants = [0] * n_bags
+        self.total_contents = [0] * n_bags
+        for bag_id in order:
+            descendants, total = 0, 0
+            for edge in range(graph.offsets[bag_id], graph.offsets[bag_id + 1]):
+                inner_id, quantity = graph.targets[edge], graph.quantities[edge]
+                descendants |= (1 << inner_id) | self.descendants[inner_id]
+                total += quantity * (1 + self.total_contents[inner_id])
+            self.descendants[bag_id], self.total_contents[bag_id] = descendants, total
+
+        self.ancestors = [0] * n_bags
+        for bag_id in reversed(order):  # containers come first
+            ancestors = (1 << bag_id) | self.ancestors[bag_id]
+            for inner_id in children[bag_id]:
+                self.ancestors[inner_id] |= ancestors
+
+    @classmethod
+    def from_file(
+        cls, input_file: Path = INPUT_FILE, cache_directory: Path = CACHE_DIRECTORY
+    ) -> "BagIndex":
+        return cls(get_bag_graph(input_file, cache_directory))
+
+    def can_contain(self, container: str, target: str) -> bool:
+        """Whether the container bag eventually holds the target bag, in O(1)."""
+        return bool((self.descendants[self.color_ids[container]] >> self.color_ids[target]) & 1)
+
+    def count_containers(self, color: str) -> int:
+        """How many bags eventually contain the given one, in O(popcount)."""
+        return count_bits(self.ancestors[self.color_ids[color]])
+
+    def get_containers(self, color: str) -> List[str]:
+        """All bags eventually containing the given one."""
+        ancestors = self.ancestors[self.color_ids[color]]
+        return [self.graph.colors[bag_id] for bag_id in iter_bits(ancestors)]
+
+    def get_contained(self, color: str) -> List[str]:
+        """All bags eventually contained in the given one."""
+        descendants = self.descendants[self.color_ids[color]]
+        return [self.graph.colors[bag_id] for bag_id in iter_bits(descendants)]
+
+    def count_total_contents(self, color: str) -> int:
+        """How many bags are eventually inside the given one, in O(1)."""
+        return self.total_contents[self.color_ids[color]]
+
+
 def solution_part_1(inputs: List[str]) -> int:
-    possible_bags = 0
     bag_rules: dict = get_bag_rules(inputs)
-    for bag, _ in bag_rules.items():
-        if bag != "shiny gold":
-            possible_bags += check_bag(bag_rules, "shiny gold", bag)
-    return possible_bags
+    return len(get_containing_bags(get_reverse_rules(bag_rules), "shiny gold"))
 
 
-def solution_part_2(inputs: List[str]) -> int:
-    result = 0
-    bag_rules: dict = get_bag_rules(inputs)
+def get_topological_order(bag_rules: dict, colors: Optional[List[str]] = None) -> list:
+    """
+    Return all bags ordered so that every bag comes after the bags it contains, through an
+    iterative DFS. Raises a ValueError describing the cycle if the rules contain one. If bags are
+    integer IDs, their colors can be given to describe the cycle with.
+    """
+    order: list = []
+    done: set = set()
+    for root in bag_rules:
+        if root in done:
+            continue
+        path = [root]
+        on_path: set = {root}
+        stack = [iter(bag_rules.get(root, {}))]
+        while stack:
+            for inner_bag in stack[-1]:
+                if inner_bag in on_path:
+                    cycle = path[path.index(inner_bag) :] + [inner_bag]
+                    cycle = [colors[bag] for bag in cycle] if colors else cycle
+                    raise ValueError(f"Bag rules contain a cycle: {' -> '.join(cycle)}")
+                if inner_bag not in done:
+                    path.append(inner_bag)
+                    on_path.add(inner_bag)
+                    stack.append(iter(bag_rules.get(inner_bag, {})))
+                    break
+            else:  # all inner bags are ordered, this one can be too
+                bag = path.pop()
+                on_path.discard(bag)
+                done.add(bag)
+                order.append(bag)
+                stack.pop()
+    return order
+
+
+def get_total_contents(bag_rules: dict) -> Dict[str, int]:
+    """
+    Return how many bags each bag eventually holds, computed exactly once per bag by going through
+    the bags in topological order. Python integers don't overflow, so counts are always exact.
+    """
+    total_contents: Dict[str, int] = {}
+    for bag in get_topological_order(bag_rules):
+        total_contents[bag] = sum(
+            quantity * (1 + total_contents[inner_bag])
+            for inner_bag, quantity in bag_rules.get(bag, {}).items()
+        )
+    return total_contents
 
-    def add_colors(rules: dict, color: str) -> int:
-        total = 0
-        for other_color, quantity in rules[color].items():
-            total += quantity * (1 + add_colors(rules, other_color))
-        return total
 
-    return add_colors(rules=bag_rules, color="shiny gold")
+def solution_part_2(inputs: List[str]) -> int:
+    bag_rules: dict = get_bag_rules(inputs)
+    return get_total_contents(bag_rules)["shiny gold"]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+"""
+Compare the speed of the day 8 interpreter, run_program, with the compiled runners from
+get_compiled_runner, on repeated executions of the puzzle's program and of its repaired variant.
+Run from the day_8 directory with: python benchmark.py
+"""
+import timeit
+
+from main import INPUT_PROGRAM, JMP, NOP, Program, get_compiled_runner, repair_program, run_program
+
+REPEATS: int = 1_000
+
+
+def get_repaired_program(program: Program) -> Program:
+    _, repaired_index = repair_program(program)
+    opcodes = program.opcodes[:]
+    if repaired_index is not None:
+        opcodes[repaired_index] = JMP if opcodes[repaired_index] == NOP else NOP
+    return Program(opcodes, program.operands[:])
+
+
+def benchmark(name: str, program: Program, repeats: int = REPEATS) -> None:
+    compile_time = timeit.timeit(lambda: get_compiled_runner(program), number=1)  # fills cache
+    runner = get_compiled_runner(program)
+    assert runner() == run_program(program)
+
+    interpreted_time = timeit.timeit(lambda: run_program(program), number=repeats)
+    compiled_time = timeit.timeit(runner, number=repeats)
+    print(
+        f"{name}: interpreter {1e6 * interpreted_time / repeats:.1f}µs/run, "
+        f"compiled {1e6 * compiled_time / repeats:.1f}µs/run "
+        f"(speedup x{interpreted_time / compiled_time:.1f}, one-off compilation "
+        f"{1e3 * compile_time:.2f}ms)"
+    )
+
+
+if __name__ == "__main__":
+    benchmark("Looping program", INPUT_PROGRAM)
+    benchmark("Repaired program", get_repaired_program(INPUT_PROGRAM))
@@ -110,75 +110,328 @@ the accumulator contains the value 8 (acc +1, acc +1, acc +6).
 Fix the program so that it terminates normally by changing exactly one jmp (to nop) or nop (to
 jmp). What is the value of the accumulator after the program terminates?
 """
-import shlex
+import hashlib
+from array import array
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import List
+from typing import Callable, Deque, Iterable, List, Optional, Tuple
 
 INPUT_FILE: Path = Path(__file__).parent / "input.txt"
 INPUT_LINES: List[str] = INPUT_FILE.read_text().split("\n")
-INPUT_COMMANDS: List[List[str]] = [shlex.split(line) for line in INPUT_LINES]
 
+NOP, ACC, JMP = 0, 1, 2
+OPCODES = {"nop": NOP, "acc": ACC, "jmp": JMP}
 
-def get_accumulator(input_commands: List[List[str]]) -> int:
-    accumulator, index = 0, 0
-    seen_indexes = []
-    while len(seen_indexes) == len(set(seen_indexes)):  # we haven't already been at this index
-        command, value = input_commands[index]
-        if len(seen_indexes) != len(set(seen_indexes)):
-            return accumulator
+
+@dataclass
+class Program:
+    """Boot code decoded once: instruction i is opcodes[i] applied with argument operands[i]."""
+
+    opcodes: array
+    operands: array
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+
+def compile_program(lines: Iterable[str]) -> Program:
+    opcodes, operands = array("b"), array("i")
+    for line in lines:
+        if not line.strip():
+            continue
+        command, value = line.split()
+        opcodes.append(OPCODES[command])
+        operands.append(int(value))
+    return Program(opcodes, operands)
+
+
+INPUT_PROGRAM: Program = compile_program(INPUT_LINES)
+TERMINATED, CRASHED = -1, -2  # special successors of a block that leaves the program
+MAX_COMPILED_RUNNERS: int = 256
+COMPILED_RUNNERS: "OrderedDict[str, Callable[[], Tuple[int, bool]]]" = OrderedDict()  # LRU first
+
+
+def run_program(program: Program) -> Tuple[int, bool]:
+    """
+    Execute the program until it either terminates (tries to run the instruction right after the
+    last one) or is about to run an instruction a second time. Return the accumulator value at
+    that point, and whether the program terminated.
+    """
+    opcodes, operands = program.opcodes, program.operands
+    visited = bytearray(len(opcodes))
+    accumulator, position = 0, 0
+    while 0 <= position < len(opcodes) and not visited[position]:
+        visited[position] = 1
+        opcode = opcodes[position]
+        if opcode == ACC:
+            accumulator += operands[position]
+            position += 1
+        elif opcode == JMP:
+            position += operands[position]
+        else:
+            position += 1
+    return accumulator, position == len(opcodes)
+
+
+def get_basic_blocks(program: Program) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Split the program into basic blocks, which start at position 0, at jump targets and right
+    after jumps. Return each block's starting position, accumulator delta (sum of its acc
+    operands) and successor block index, TERMINATED or CRASHED.
+    """
+    opcodes, operands = program.opcodes, program.operands
+    size = len(opcodes)
+    leaders = {0} if size else set()
+    for position, (opcode, operand) in enumerate(zip(opcodes, operands)):
+        if opcode == JMP:
+            leaders.update(
+                leader for leader in (position + operand, position + 1) if 0 <= leader < size
+            )
+    starts = sorted(leaders)
+    block_of = {start: block for block, start in enumerate(starts)}
+
+    def get_successor(position: int) -> int:
+        if position == size:
+            return TERMINATED
+        return block_of[position] if 0 <= position < size else CRASHED
+
+    deltas, successors = [], []
+    for block, start in enumerate(starts):
+        end = starts[block + 1] if block + 1 < len(starts) else size
+        deltas.append(sum(operands[i] for i in range(start, end) if opcodes[i] == ACC))
+        last = end - 1
+        successors.append(get_successor(last + operands[last] if opcodes[last] == JMP else end))
+    return starts, deltas, successors
+
+
+def merge_block_chains(deltas: List[int], successors: List[int]) -> Tuple[List[int], List[int]]:
+    """
+    Merge every block into its predecessor when it has only that one, the entry block excepted.
+    Such a block can only be reached again after its predecessor has, so merging them keeps the
+    point where the program is stopped unchanged. Return the merged blocks' deltas and successors.
+    """
+    n_blocks = len(deltas)
+    predecessors_count = [0] * n_blocks
+    for successor in successors:
+        if successor >= 0:
+            predecessors_count[successor] += 1
+
+    def is_merged(block: int) -> bool:
+        return block > 0 and predecessors_count[block] == 1
+
+    heads = [block for block in range(n_blocks) if not is_merged(block)]
+    new_index = {head: index for index, head in enumerate(heads)}
+    merged_deltas, merged_successors = [], []
+    for head in heads:
+        delta, block = deltas[head], head
+        while successors[block] >= 0 and is_merged(successors[block]) and successors[block] != head:
+            block = successors[block]
+            delta += deltas[block]
+        successor = successors[block]
+        merged_deltas.append(delta)
+        merged_successors.append(new_index.get(successor, successor))
+    return merged_deltas, merged_successors
+
+
+def get_program_hash(program: Program) -> str:
+    return hashlib.sha256(program.opcodes.tobytes() + program.operands.tobytes()).hexdigest()
+
+
+def make_block_runner(deltas: List[int], successors: List[int]) -> Callable[[], Tuple[int, bool]]:
+    """
+    Return a function behaving like run_program on the program split into these blocks, which
+    goes through whole blocks at a time, adding each one's folded accumulator delta.
+    """
+    block_deltas, block_successors = tuple(deltas), tuple(successors)
+    entry = 0 if deltas else TERMINATED  # an empty program terminates right away
+
+    def run() -> Tuple[int, bool]:
+        deltas, successors = block_deltas, block_successors
+        visited = bytearray(len(deltas))
+        accumulator, block = 0, entry
+        while block >= 0:
+            if visited[block]:
+                return accumulator, False
+            visited[block] = 1
+            accumulator += deltas[block]
+            block = successors[block]
+        return accumulator, block == TERMINATED
+
+    return run
+
+
+def get_compiled_runner(program: Program) -> Callable[[], Tuple[int, bool]]:
+    """
+    Return a function behaving like run_program on this program, compiled once into its merged
+    basic blocks. Runners are cached by program hash, keeping the MAX_COMPILED_RUNNERS most
+    recently used ones, so executing the same program again reuses its compiled form.
+    """
+    program_hash = get_program_hash(program)
+    if program_hash in COMPILED_RUNNERS:
+        COMPILED_RUNNERS.move_to_end(program_hash)
+        return COMPILED_RUNNERS[program_hash]
+
+    _, deltas, successors = get_basic_blocks(program)
+    runner = make_block_runner(*merge_block_chains(deltas, successors))
+    COMPILED_RUNNERS[program_hash] = runner
+    if len(COMPILED_RUNNERS) > MAX_COMPILED_RUNNERS:
+        COMPILED_RUNNERS.popitem(last=False)
+    return runner
+
+
+@dataclass
+class ExecutionProfile:
+    """
+    What an instrumented run saw: how many times each instruction was executed, the first
+    instruction to be reached again (cycle_entry) with the number of steps of the cycle, the
+    accumulator value each time the cycle entry was reached, and the last executed steps as
+    (step, position, accumulator before the instruction) tuples.
+    """
+
+    execution_counts: array
+    cycle_entry: Optional[int] = None
+    cycle_length: Optional[int] = None
+    cycle_accumulators: List[int] = field(default_factory=list)
+    trace: Deque[Tuple[int, int, int]] = field(default_factory=deque)
+
+
+class Interpreter:
+    """
+    Runs a program plainly, with instrumentation or compiled. The dispatch loop is picked once at
+    construction: without instrumentation, run is run_program itself and costs nothing extra.
+    When instrumented, each run stores an ExecutionProfile in the profile attribute, keeps the
+    last trace_size steps, and goes around a detected cycle up to max_loops times. When compiled,
+    run is the program's cached runner from get_compiled_runner.
+    """
+
+    def __init__(
+        self,
+        program: Program,
+        instrumented: bool = False,
+        trace_size: int = 64,
+        max_loops: int = 1,
+        compiled: bool = False,
+    ):
+        if instrumented and compiled:
+            raise ValueError("Compiled programs can't be instrumented")
+        self.program = program
+        self.trace_size = trace_size
+        self.max_loops = max_loops
+        self.profile: Optional[ExecutionProfile] = None
+        self.run: Callable[[], Tuple[int, bool]]
+        if compiled:
+            self.run = get_compiled_runner(program)
+        elif instrumented:
+            self.run = self._run_instrumented
         else:
-            if command == "nop":  # do nothing, go next
-                index += 1
-            elif command == "acc":
-                accumulator += int(value)
-                index += 1
-            else:  # we get 'jmp'
-                index += int(value)
-            seen_indexes.append(index)
-    return accumulator
-
-
-def solution_part_1(inputs: List[List[str]]) -> int:
-    return get_accumulator(inputs)
-
-
-def change_command_at_index(inputs: List[List[str]], index=0):
-    copy = inputs.copy()
-    if copy[index][0] == "acc":
-        pass
-    elif copy[index][0] == "nop":
-        copy[index][0] = "jmp"
-    else:
-        copy[index][0] = "nop"
-    return copy
-
-
-def solution_part_2(inputs: List[List[str]]) -> int:
-    def solve(command_inputs: List[List[str]]) -> int:
-        accumulator, position = 0, 0
-        seen_indexes = [False] * len(command_inputs)
-        while position < len(command_inputs) and not seen_indexes[position]:
-            seen_indexes[position] = True
-            command, value = command_inputs[position]
-            value = int(value)
-            if command == "acc":
-                accumulator += value
-            elif command == "jmp":
-                position += value - 1
+            self.run = partial(run_program, program)
+
+    def _run_instrumented(self) -> Tuple[int, bool]:
+        opcodes, operands = self.program.opcodes, self.program.operands
+        size = len(opcodes)
+        counts = array("L", [0]) * size
+        first_steps = array("q", [0]) * size  # step and accumulator at an instruction's first run
+        first_accumulators = array("q", [0]) * size
+        profile = ExecutionProfile(execution_counts=counts, trace=deque(maxlen=self.trace_size))
+        self.profile = profile
+        accumulator, position, step = 0, 0, 0
+
+        while 0 <= position < size:
+            if counts[position]:
+                if profile.cycle_entry is None:  # first time an instruction is reached again
+                    profile.cycle_entry = position
+                    profile.cycle_length = step - first_steps[position]
+                    profile.cycle_accumulators.append(first_accumulators[position])
+                if position == profile.cycle_entry:
+                    profile.cycle_accumulators.append(accumulator)
+                if counts[position] >= self.max_loops:
+                    break
+            else:
+                first_steps[position] = step
+                first_accumulators[position] = accumulator
+            counts[position] += 1
+            profile.trace.append((step, position, accumulator))
+
+            opcode = opcodes[position]
+            if opcode == ACC:
+                accumulator += operands[position]
+                position += 1
+            elif opcode == JMP:
+                position += operands[position]
+            else:
+                position += 1
+            step += 1
+        return accumulator, position == size
+
+
+def solution_part_1(inputs: Program) -> int:
+    return run_program(inputs)[0]
+
+
+def get_terminating_positions(program: Program) -> bytearray:
+    """
+    Return a map of which positions, from 0 to len(program) included, lead the unmodified program
+    to terminate. Found by walking edges backwards from the end position, len(program).
+    """
+    opcodes, operands = program.opcodes, program.operands
+    size = len(opcodes)
+    predecessors: List[List[int]] = [[] for _ in range(size + 1)]
+    for position, (opcode, operand) in enumerate(zip(opcodes, operands)):
+        successor = position + operand if opcode == JMP else position + 1
+        if 0 <= successor <= size:
+            predecessors[successor].append(position)
+
+    terminating = bytearray(size + 1)
+    terminating[size] = 1
+    stack = [size]
+    while stack:
+        for predecessor in predecessors[stack.pop()]:
+            if not terminating[predecessor]:
+                terminating[predecessor] = 1
+                stack.append(predecessor)
+    return terminating
+
+
+def repair_program(program: Program) -> Tuple[int, Optional[int]]:
+    """
+    Find the single nop / jmp swap making the program terminate, in O(n): execute the program
+    once and swap the first visited instruction whose swapped successor is known to terminate.
+    Return the accumulator at termination and the repaired index (None if nothing needed fixing).
+    """
+    opcodes, operands = program.opcodes, program.operands
+    size = len(opcodes)
+    terminating = get_terminating_positions(program)
+    visited = bytearray(size)
+    accumulator, position, repaired_index = 0, 0, None
+    needs_repair = not terminating[0]
+
+    while 0 <= position < size and not visited[position]:
+        visited[position] = 1
+        opcode, operand = opcodes[position], operands[position]
+        if needs_repair and repaired_index is None and opcode != ACC:
+            swapped_successor = position + 1 if opcode == JMP else position + operand
+            if 0 <= swapped_successor <= size and terminating[swapped_successor]:
+                repaired_index, position = position, swapped_successor
+                continue
+        if opcode == ACC:
+            accumulator += operand
             position += 1
-        return accumulator if position == len(command_inputs) else -1
+        elif opcode == JMP:
+            position += operand
+        else:
+            position += 1
+
+    if position != size:
+        raise ValueError("No single nop / jmp swap makes this program terminate")
+    return accumulator, repaired_index
+
 
-    result = -1
-    for index, _ in enumerate(inputs):
-        if inputs[index][0] != "acc":
-            inputs[index][0] = "jmp" if inputs[index][0] == "nop" else "nop"  # do change
-            result = solve(inputs)  # solve
-            inputs[index][0] = "jmp" if inputs[index][0] == "nop" else "nop"  # put back
-        if result != -1:  # we've done the right change
-            break
-    return result
+def solution_part_2(inputs: Program) -> int:
+    return repair_program(inputs)[0]
 
 
 if __name__ == "__main__":
-    print(f"Solution for part 1:  {solution_part_1(INPUT_COMMANDS)}")
-    print(f"Solution for part 2:  {solution_part_2(INPUT_COMMANDS)}")
+    print(f"Solution for part 1:  {solution_part_1(INPUT_PROGRAM)}")
+    print(f"Solution for part 2:  {solution_part_2(INPUT_PROGRAM)}")